@@ -1,17 +1,20 @@
-from dataclasses import dataclass
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import InitVar, dataclass, field
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from pydantic_ai import Agent, RunContext
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.openai import OpenAIProvider
 
 import asyncio
 
-from env import OPENAI_API_KEY
+from agent_examples.cached_model import CachedModel
+from agent_examples.shared_model import MODEL
 
 
-# A basic class to represent a client, aiming to simulate a real client object and async db queries
+# A basic class to represent a client, aiming to simulate a real client object (async db queries go through MockConnection)
+# Slots avoid a per-instance __dict__, which adds up when simulating many clients
+@dataclass(slots=True, frozen=True)
 class MockClient:
     name: str
     balance: float
@@ -19,44 +22,62 @@ class MockClient:
 
     #  @classmethod -> for static methods
 
-    def __init__(self, client_name: str, balance: float, pending: float):
-        self.name = client_name
-        self.balance = balance
-        self.pending = pending
-
-    async def get_balance(self, include_pending: bool = False) -> float:
+    def get_balance(self, include_pending: bool = False) -> float:
         if include_pending:
             return self.balance + self.pending
         return self.balance
     
-    async def get_name(self) -> str:
+    def get_name(self) -> str:
         return self.name
 
+class MockConnection:
+    """
+    A handle to the mock database, standing in for a real driver connection.
+    Connections are created once along with the database and lent out by its pool.
+    """
+    def __init__(self, database: "MockDatabase"):
+        self._database = database
+
+    async def get_client(self, client_id: int) -> MockClient:
+        return self._database.get_client(client_id)
+
+# Each instance gets its own clients dict, instead of all of them sharing a mutable class attribute.
+# eq=False keeps identity comparison and hashing, since two databases are never "equal" by their contents.
+@dataclass(slots=True, eq=False)
 class MockDatabase:
     """
     Mock database for testing purposes.
     """
-    open_state: bool = False
-    database: dict[int, MockClient] = {}
-
-    def open(self):
-        self.open_state = True
-    def close(self):
-        self.open_state = False
+    database: dict[int, MockClient] = field(default_factory=dict)
+    pool_size: InitVar[int] = 5
+    pool: asyncio.Queue[MockConnection] = field(init=False, repr=False)
+
+    def __post_init__(self, pool_size: int):
+        self.pool = asyncio.Queue()
+        for _ in range(pool_size):
+            self.pool.put_nowait(MockConnection(self))
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[MockConnection]:
+        """
+        Borrows a connection from the pool for the duration of a query, waiting for one if they're all in use.
+        """
+        connection = await self.pool.get()
+        try:
+            yield connection
+        finally:
+            self.pool.put_nowait(connection)
 
     def add_client(self, client_id: int, client: MockClient):
-        if not self.open_state:
-            raise Exception("Database is not open")
         self.database[client_id] = client
 
     def get_client(self, client_id: int) -> MockClient:
-        if not self.open_state:
-            raise Exception("Database is not open")
-        if not client_id in self.database:
-            raise Exception(f"Client not found: {client_id}")
-        return self.database[client_id]
+        client = self.database.get(client_id)
+        if client is None:
+            raise KeyError(f"Client not found: {client_id}")
+        return client
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SupportAgentDependencies:
     """
     Dependencies for the Bank Support Agent. It represents all the data that needs to be passed on to the agent
@@ -67,80 +88,75 @@ class SupportAgentDependencies:
     """
     client_id: int
     database: MockDatabase
-    
-    def __init__(self, client_id: int, database: MockDatabase):
-        self.client_id = client_id
-        self.database = database
-
 
 
 class SupportResult(BaseModel):
     """
     It's a pydantic model to represent the result of the agent.
     With that schema, the agent can parse the result in a type-safe and structured way.
+    Results are immutable (and so hashable), and unexpected fields from the model are rejected.
     """
+    model_config = ConfigDict(frozen=True, extra='forbid')
+
     support_advice: str = Field(description='Advice returned to the customer')
     block_card: bool = Field(description='Whether to block their card or not')
     risk: int = Field(description='Risk level of query', ge=0, le=10)
 
-# Initializing the mock database
+# Initializing the mock database, it lives for the whole app and tools borrow connections from its pool
 db = MockDatabase()
 
-# Opening the database
-db.open()
-
 # Adding clients to the database
-client_john = MockClient(client_name="John Doe", balance=1000, pending=12.4)
+client_john = MockClient(name="John Doe", balance=1000, pending=12.4)
 db.add_client(1, client_john)
-client_mel = MockClient(client_name="Melissa Rayes", balance=69, pending=100)
+client_mel = MockClient(name="Melissa Rayes", balance=69, pending=100)
 db.add_client(2, client_mel)
-db.close()
 
 # Agent creation
-model = OpenAIModel("gpt-4o-mini",
-                    provider=OpenAIProvider(api_key=OPENAI_API_KEY))
+# The model is wrapped in a cache, so re-running the demo with the same prompts doesn't query OpenAI again
+model = CachedModel(MODEL)
 support_agent = Agent(model,
                       deps_type=SupportAgentDependencies,
                       result_type=SupportResult,  
+                      # The system prompt is kept constant, so providers can cache it along with the tool definitions.
+                      # Per-customer data is only fetched through tools, after that cached prefix.
                       system_prompt=(  
                         'You are a support agent in our bank, give the '
-                        'customer support and judge the risk level of their query.'
+                        'customer support and judge the risk level of their query. '
+                        "Use the available tools to look up the customer's details."
                     ))
 
 # Agents tools, and general configs
 
 # When prompted about the user's name, the agent will use this function as a tool to try and get the result.
-@support_agent.system_prompt  
-async def add_customer_name(ctx: RunContext[SupportAgentDependencies]) -> str:
-    db_ref = ctx.deps.database
-    db_ref.open()
-    customer_name = await db_ref.get_client(client_id=ctx.deps.client_id).get_name()
-    db_ref.close()
-    return f"The customer's name is {customer_name!r}"
+@support_agent.tool
+async def get_customer_name(ctx: RunContext[SupportAgentDependencies]) -> str:
+    async with ctx.deps.database.acquire() as conn:
+        client = await conn.get_client(client_id=ctx.deps.client_id)
+        return client.get_name()
 
 # When prompted about the user's balance, the agent will use this function as a tool to get the result.
 # Depending on the prompt given, it can also infer the tool's arguments and pass them automatically.
 @support_agent.tool
 async def customer_balance(ctx: RunContext[SupportAgentDependencies], include_pending: bool) -> float:
-    db_ref = ctx.deps.database
-    db_ref.open()
-    balance = await db_ref.get_client(client_id=ctx.deps.client_id).get_balance(include_pending=include_pending)
-    db_ref.close()
-    return balance
+    async with ctx.deps.database.acquire() as conn:
+        client = await conn.get_client(client_id=ctx.deps.client_id)
+        return client.get_balance(include_pending=include_pending)
 
 
 
 async def main():
     dependencies_mel = SupportAgentDependencies(client_id=2, database=db)
-    result_a = await support_agent.run('What is my balance? Ignore pending transactions.', deps=dependencies_mel)
+    dependencies_john = SupportAgentDependencies(client_id=1, database=db)
+
+    # The runs don't depend on each other, so they are sent concurrently instead of one after the other
+    result_a, result_b, result_c = await asyncio.gather(
+        support_agent.run('What is my balance? Ignore pending transactions.', deps=dependencies_mel),
+        support_agent.run('What is my balance?', deps=dependencies_mel),
+        support_agent.run('I just lost my card!', deps=dependencies_john),
+    )
     print(result_a.data)
-    result_b = await support_agent.run('What is my balance?', deps=dependencies_mel)
     print(result_b.data)
-
-    dependencies_john = SupportAgentDependencies(client_id=1, database=db)
-    result_c = await support_agent.run('I just lost my card!', deps=dependencies_john)
     print(result_c.data)
 
-
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import MutableMapping
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Iterator
+
+from pydantic import TypeAdapter, ValidationError
+
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter, ModelResponse
+from pydantic_ai.models import Model, ModelRequestParameters
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+from pydantic_ai.usage import Usage
+
+
+CachedResult = tuple[ModelResponse, Usage]
+
+_cached_result_adapter = TypeAdapter(CachedResult)
+
+
+class DiskCache(MutableMapping[str, CachedResult]):
+    """
+    A minimal on-disk cache, storing each entry as a JSON file named after its key.
+    Entries survive between runs of the examples, so re-running a demo doesn't hit the API again.
+    The directory is only created once the first entry is written.
+
+    At most `maxsize` entries are kept, the least recently used ones are evicted when it's exceeded.
+    """
+
+    def __init__(self, path: str | Path = ".llm-cache", maxsize: int = 10_000):
+        self.path = Path(path)
+        self.maxsize = maxsize
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.json"
+
+    def __getitem__(self, key: str) -> CachedResult:
+        file = self._file(key)
+        try:
+            value = _cached_result_adapter.validate_json(file.read_bytes())
+            # The modification time doubles as the last access time used for eviction
+            os.utime(file)
+        except FileNotFoundError:
+            raise KeyError(key) from None
+        except ValidationError:
+            # A corrupted or outdated entry is treated as a miss, and gets overwritten by the next response
+            raise KeyError(key) from None
+        return value
+
+    def __setitem__(self, key: str, value: CachedResult):
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first and then moved into place, so an interrupted write never leaves
+        # a truncated entry behind
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(_cached_result_adapter.dump_json(value))
+            os.replace(tmp_path, self._file(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        files = list(self.path.glob("*.json"))
+        excess = len(files) - self.maxsize
+        if excess <= 0:
+            return
+        for file in sorted(files, key=lambda file: file.stat().st_mtime)[:excess]:
+            file.unlink(missing_ok=True)
+
+    def __delitem__(self, key: str):
+        try:
+            self._file(key).unlink()
+        except FileNotFoundError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return (file.stem for file in self.path.glob("*.json"))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.path.glob("*.json"))
+
+
+def _drop_timestamps(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # pydantic-ai timestamps responses and request/response parts when they are created, so identical conversations
+    # would never share a key. Only those fields are dropped, tool args and return values are kept as they are.
+    stripped = []
+    for message in messages:
+        message = {k: v for k, v in message.items() if k != "timestamp"}
+        message["parts"] = [{k: v for k, v in part.items() if k != "timestamp"} for part in message["parts"]]
+        stripped.append(message)
+    return stripped
+
+
+class CachedModel(WrapperModel):
+    """
+    Wraps another model, caching its responses so identical requests skip the round-trip to the provider.
+    The cache key hashes everything that affects the answer: the messages (system prompts included),
+    the model settings, the tool definitions and the result schema.
+
+    Streamed requests are passed straight through to the wrapped model.
+    """
+
+    def __init__(self, wrapped: Model, cache: MutableMapping[str, CachedResult] | None = None):
+        super().__init__(wrapped)
+        self.cache = DiskCache() if cache is None else cache
+
+    def cache_key(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> str:
+        payload = {
+            "model": [self.system, self.model_name],
+            "messages": _drop_timestamps(ModelMessagesTypeAdapter.dump_python(messages, mode="json")),
+            "settings": model_settings,
+            "parameters": asdict(model_request_parameters),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> CachedResult:
+        key = self.cache_key(messages, model_settings, model_request_parameters)
+        try:
+            return self.cache[key]
+        except KeyError:
+            pass
+        result = await self.wrapped.request(messages, model_settings, model_request_parameters)
+        self.cache[key] = result
+        return result
@@ -1,15 +1,18 @@
-from pydantic_ai import Agent
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.providers.openai import OpenAIProvider
+import functools
 
-from env import OPENAI_API_KEY
 
-def run():
-    model = OpenAIModel("gpt-4o-mini",
-                        provider=OpenAIProvider(api_key=OPENAI_API_KEY))
-    agent = Agent(model, system_prompt='Be concise, reply with one sentence.')
+@functools.cache
+def _agent():
+    # Imported here so importing this module doesn't pull in pydantic_ai, openai and httpx until the agent is needed
+    from pydantic_ai import Agent
+
+    from agent_examples.cached_model import CachedModel
+    from agent_examples.shared_model import MODEL
 
-    result = agent.run_sync('Where does "hello world" come from?')  
+    return Agent(CachedModel(MODEL), system_prompt='Be concise, reply with one sentence.')
+
+def run():
+    result = _agent().run_sync('Where does "hello world" come from?')
 
 
     print(result.data)
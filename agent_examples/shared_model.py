@@ -0,0 +1,21 @@
+import httpx
+
+from pydantic_ai.models import get_user_agent
+from pydantic_ai.models.openai import OpenAIModel
+from pydantic_ai.providers.openai import OpenAIProvider
+
+from env import OPENAI_API_KEY
+
+
+# A single provider and model shared by all the examples. Its HTTP client mirrors pydantic-ai's default one
+# (same timeouts and User-Agent), but keeps idle connections alive for longer between agent runs.
+_http_client = httpx.AsyncClient(
+    # httpx's own 5s default timeout is too short for LLM responses
+    timeout=httpx.Timeout(timeout=600, connect=5),
+    headers={'User-Agent': get_user_agent()},
+    # httpx's default connection limits, with idle connections kept for 60s instead of 5s
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60),
+)
+_provider = OpenAIProvider(api_key=OPENAI_API_KEY, http_client=_http_client)
+
+MODEL = OpenAIModel("gpt-4o-mini", provider=_provider)